@@ -1,347 +1,530 @@
-import pandas as pd
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics.pairwise import cosine_similarity
-import jieba
-import re
-import logging
-import requests
-from typing import Optional, Dict, Tuple, List
-from langdetect import detect
-from langdetect.lang_detect_exception import LangDetectException
-
-# Configure jieba logging
-jieba.setLogLevel(logging.INFO)
-
-class TMDBSearcher:
-    """
-    Helper class for TMDB API operations with language support
-    """
-    def __init__(self, api_key: str):
-        self.base_url = "https://api.themoviedb.org/3"
-        self.api_key = api_key
-        self.language_map = {
-            'zh': 'zh-CN',
-            'en': 'en-US',
-            'ja': 'ja-JP',
-            'ko': 'ko-KR',
-            'unknown': 'zh-CN'
-        }
-
-    def detect_language(self, text: str) -> str:
-        """
-        Detect the language of input text
-        """
-        try:
-            if re.search(r'[\u4e00-\u9fff]', text):
-                return 'zh'
-            lang = detect(text)
-            return lang if lang in self.language_map else 'unknown'
-        except LangDetectException:
-            return 'unknown'
-
-    def search_movie_multi_lang(self, title: str) -> List[Dict]:
-        """
-        Search for movies using multiple language parameters
-        """
-        detected_lang = self.detect_language(title)
-        primary_lang = self.language_map[detected_lang]
-        
-        print(f"Detected language: {detected_lang}")
-        
-        primary_results = self.search_movie(title, primary_lang)
-        
-        if len(primary_results) < 3:
-            alternative_langs = ['zh-CN' if primary_lang != 'zh-CN' else 'en-US']
-            all_results = primary_results
-            
-            for lang in alternative_langs:
-                additional_results = self.search_movie(title, lang)
-                existing_ids = {movie['id'] for movie in all_results}
-                new_results = [movie for movie in additional_results 
-                             if movie['id'] not in existing_ids]
-                all_results.extend(new_results)
-            
-            return all_results
-        
-        return primary_results
-
-    def search_movie(self, title: str, language: str) -> List[Dict]:
-        """
-        Search for movies using TMDB API with specified language
-        """
-        search_url = f"{self.base_url}/search/movie"
-        params = {
-            "api_key": self.api_key,
-            "query": title,
-            "language": language,
-            "include_adult": False
-        }
-        
-        try:
-            response = requests.get(search_url, params=params)
-            response.raise_for_status()
-            return response.json().get('results', [])
-        except Exception as e:
-            print(f"Error searching TMDB: {e}")
-            return []
-
-    def get_movie_details(self, tmdb_id: int, language: str = 'zh-CN') -> Optional[Dict]:
-        """
-        Get detailed movie information from TMDB
-        """
-        details_url = f"{self.base_url}/movie/{tmdb_id}"
-        params = {
-            "api_key": self.api_key,
-            "language": language,
-            "append_to_response": "credits"
-        }
-        
-        try:
-            response = requests.get(details_url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error getting movie details: {e}")
-            return None
-
-class MultilingualMovieRecommender:
-    def __init__(self, movies_path: str, tmdb_api_key: str):
-        """
-        Initialize the multilingual movie recommender system
-        """
-        self.df = pd.read_csv(movies_path)
-        self.tmdb_searcher = TMDBSearcher(tmdb_api_key)
-        self.feature_vectors = {}
-        
-        self.text_weights = {
-            'genres': 0.20,
-            'keywords': 0.15,
-            'overview': 0.15,
-            'director': 0.10,
-            'top_actors': 0.10,
-            'production_companies': 0.05,
-            'production_countries': 0.05
-        }
-        
-        self.numeric_weights = {
-            'vote_average': 0.08,
-            'popularity': 0.05,
-            'runtime': 0.04,
-            'vote_count': 0.03
-        }
-        
-        self.stopwords = [
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
-            '的', '了', '和', '是', '就', '都', '而', '及', '与', '着',
-            '把', '让', '向', '在', '由', '这', '那', '到', '去', '又'
-        ]
-        
-        self.prepare_features()
-
-    def clean_mixed_text(self, text: str) -> str:
-        """
-        Clean and preprocess mixed language text
-        """
-        if not isinstance(text, str):
-            return ''
-        
-        text = re.sub(r'[^\w\s\u4e00-\u9fff]', ' ', text)
-        text = re.sub(r'[a-zA-Z]+', lambda m: m.group(0).lower(), text)
-        return re.sub(r'\s+', ' ', text).strip()
-
-    def tokenize_mixed_text(self, text: str) -> str:
-        """
-        Tokenize text containing both Chinese and English
-        """
-        text = self.clean_mixed_text(text)
-        
-        english_words = re.findall(r'[a-z]+', text)
-        chinese_text = re.sub(r'[a-z]+', '', text)
-        
-        chinese_words = jieba.cut(chinese_text)
-        
-        all_words = english_words + [w for w in chinese_words if w.strip()]
-        filtered_words = [w for w in all_words if w not in self.stopwords]
-        
-        return ' '.join(filtered_words)
-
-    def prepare_feature_text(self, feature_name: str) -> List[str]:
-        """
-        Prepare text feature for vectorization
-        """
-        texts = self.df[feature_name].fillna('')
-        
-        if feature_name in ['overview', 'keywords']:
-            return [self.tokenize_mixed_text(text) for text in texts]
-        else:
-            return [self.clean_mixed_text(text) for text in texts]
-
-    def prepare_features(self):
-        """
-        Prepare and vectorize all features for similarity calculation
-        """
-        for feature in self.text_weights.keys():
-            processed_texts = self.prepare_feature_text(feature)
-            
-            tfidf = TfidfVectorizer(
-                analyzer='word',
-                token_pattern=r'(?u)\b\w+\b|[\u4e00-\u9fff]+',
-                stop_words=None
-            )
-            
-            tfidf_matrix = tfidf.fit_transform(processed_texts)
-            self.feature_vectors[feature] = tfidf_matrix
-        
-        scaler = MinMaxScaler()
-        for feature in self.numeric_weights.keys():
-            self.df[feature] = self.df[feature].fillna(self.df[feature].mean())
-            scaled_values = scaler.fit_transform(self.df[feature].values.reshape(-1, 1))
-            self.feature_vectors[feature] = scaled_values
-
-    def calculate_weighted_similarity(self, movie_idx: int) -> np.ndarray:
-        """
-        Calculate weighted similarity scores
-        """
-        final_similarity = np.zeros(len(self.df))
-        
-        for feature, weight in self.text_weights.items():
-            feature_matrix = self.feature_vectors[feature]
-            similarity = cosine_similarity(
-                feature_matrix[movie_idx:movie_idx+1], 
-                feature_matrix
-            ).flatten()
-            final_similarity += similarity * weight
-        
-        for feature, weight in self.numeric_weights.items():
-            feature_values = self.feature_vectors[feature]
-            target_value = feature_values[movie_idx]
-            diff = np.abs(feature_values - target_value)
-            similarity = 1 - diff.flatten()
-            final_similarity += similarity * weight
-        
-        return final_similarity
-
-    def find_movie_by_search(self, search_title: str) -> List[Tuple[Optional[int], Optional[str], Optional[int]]]:
-        """
-        Search for a movie using TMDB API and find all matching records in the dataset.
-
-        Returns a list of tuples containing:
-        - idx: The index of the movie in the local dataset (Optional[int])
-        - title: The title of the movie in the local dataset (Optional[str])
-        - tmdb_id: The TMDB ID of the movie (Optional[int])
-        """
-        print(f"\nSearching for '{search_title}'...")
-
-        search_results = self.tmdb_searcher.search_movie_multi_lang(search_title)
-
-        if not search_results:
-            print("No movies found on TMDB")
-            return []
-
-        matched_movies = []
-
-        for movie in search_results:
-            detected_lang = self.tmdb_searcher.detect_language(search_title)
-            movie_details = self.tmdb_searcher.get_movie_details(
-                movie['id'],
-                self.tmdb_searcher.language_map.get(detected_lang, 'en-US')
-            )
-
-            if not movie_details:
-                print(f"Could not get details for TMDB ID: {movie['id']}")
-                matched_movies.append((None, None, movie['id']))
-                continue
-
-            tmdb_id = movie['id']
-            dataset_match = self.df[self.df['tmdb_id'] == tmdb_id]
-
-            if not dataset_match.empty:
-                idx = dataset_match.index[0]
-                title = dataset_match.iloc[0]['title']
-                print(f"\nFound in dataset: {title}")
-                matched_movies.append((idx, title, tmdb_id))
-            else:
-                print(f"\nMovie not found in local dataset: TMDB ID {tmdb_id}")
-                matched_movies.append((None, None, tmdb_id))
-
-        return matched_movies
-
-    def get_movie_recommendations(self, search_title: str, n_recommendations: int = 5,
-                                  min_rating: float = None, min_votes: int = None) -> Optional[pd.DataFrame]:
-        """
-        Get movie recommendations based on search.
-        """
-        matched_movies = self.find_movie_by_search(search_title)
-
-        if not matched_movies:
-            print("Cannot generate recommendations: no movies found in search")
-            return None
-
-
-        best_match = matched_movies[0]
-        movie_idx, actual_title, tmdb_id = best_match
-
-        if movie_idx is None:
-            print("Cannot generate recommendations: best match not found in dataset")
-            return None
-
-        similarity_scores = self.calculate_weighted_similarity(movie_idx)
-
-        mask = np.ones(len(self.df), dtype=bool)
-        if min_rating is not None:
-            mask &= self.df['vote_average'] >= min_rating
-        if min_votes is not None:
-            mask &= self.df['vote_count'] >= min_votes
-
-        filtered_scores = similarity_scores * mask
-        similar_indices = filtered_scores.argsort()[::-1][1:n_recommendations + 1]
-
-        recommendations = pd.DataFrame({
-            'tmdb_id': self.df.iloc[similar_indices]['tmdb_id'],
-            'title': self.df.iloc[similar_indices]['title'],
-            'year': self.df.iloc[similar_indices]['year'],
-            'genres': self.df.iloc[similar_indices]['genres'],
-            'director': self.df.iloc[similar_indices]['director'],
-            'top_actors': self.df.iloc[similar_indices]['top_actors'],
-            'vote_average': self.df.iloc[similar_indices]['vote_average'],
-            'vote_count': self.df.iloc[similar_indices]['vote_count'],
-            'runtime': self.df.iloc[similar_indices]['runtime'],
-            'similarity_score': filtered_scores[similar_indices]
-        })
-
-        return recommendations.sort_values('similarity_score', ascending=False)
-
-def main():
-    TMDB_API_KEY = "b32b227102e481fb8a48b5f68065a3b9"
-    
-    try:
-        recommender = MultilingualMovieRecommender(
-            movies_path='Data\enriched_movies.csv',
-            tmdb_api_key=TMDB_API_KEY
-        )
-        
-        while True:
-            search_title = input("\nEnter movie title (or 'quit' to exit): ")
-            if search_title.lower() == 'quit':
-                break
-                
-            recommendations = recommender.get_movie_recommendations(
-                search_title=search_title,
-                n_recommendations=5,
-                min_rating=7.0,
-                min_votes=1000
-            )
-            
-            if recommendations is not None:
-                print("\nTop 5 recommendations:")
-                print(recommendations.to_string(index=False))
-            
-            print("\n" + "="*80)
-        
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-if __name__ == "__main__":
+import orjson
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.preprocessing import MinMaxScaler, normalize
+try:
+    # C-extension reimplementation of jieba's hot loops, API-compatible
+    import jieba_fast as jieba
+except ImportError:
+    import jieba
+import joblib
+import os
+import re
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Tuple, List
+from langdetect import detect
+from langdetect.lang_detect_exception import LangDetectException
+
+# Configure jieba logging
+jieba.setLogLevel(logging.INFO)
+
+# Compile the tokenization regexes once instead of per document
+CHINESE_RE = re.compile(r'[一-鿿]')
+JAPANESE_KANA_RE = re.compile(r'[぀-ゟ゠-ヿ]')
+HANGUL_RE = re.compile(r'[가-힯]')
+ASCII_ONLY_RE = re.compile(r'^[\x00-\x7f]+$')
+PUNCTUATION_RE = re.compile(r'[^\w\s一-鿿]')
+ENGLISH_RE = re.compile(r'[a-zA-Z]+')
+LOWER_ENGLISH_RE = re.compile(r'[a-z]+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+class TMDBSearcher:
+    """
+    Helper class for TMDB API operations with language support
+    """
+    def __init__(self, api_key: str):
+        self.base_url = "https://api.themoviedb.org/3"
+        self.api_key = api_key
+        # Reuse one pooled connection instead of a TCP/TLS handshake per call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.language_map = {
+            'zh': 'zh-CN',
+            'en': 'en-US',
+            'ja': 'ja-JP',
+            'ko': 'ko-KR',
+            'unknown': 'zh-CN'
+        }
+
+    def detect_language(self, text: str) -> str:
+        """
+        Detect the language of input text
+
+        Cheap script-range checks cover the common cases; the probabilistic
+        langdetect model only runs when the script is ambiguous
+        """
+        # Kana before the CJK check: Japanese titles usually mix both
+        if JAPANESE_KANA_RE.search(text):
+            return 'ja'
+        if HANGUL_RE.search(text):
+            return 'ko'
+        if CHINESE_RE.search(text):
+            return 'zh'
+        if ASCII_ONLY_RE.match(text):
+            return 'en'
+        try:
+            lang = detect(text)
+            return lang if lang in self.language_map else 'unknown'
+        except LangDetectException:
+            return 'unknown'
+
+    def search_movie_multi_lang(self, title: str) -> List[Dict]:
+        """
+        Search for movies using multiple language parameters
+        """
+        detected_lang = self.detect_language(title)
+        primary_lang = self.language_map[detected_lang]
+
+        print(f"Detected language: {detected_lang}")
+
+        alternative_lang = 'zh-CN' if primary_lang != 'zh-CN' else 'en-US'
+
+        # Fire both language searches concurrently; the alternative result
+        # is only merged in when the primary search comes back thin
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            primary_future = executor.submit(self.search_movie, title, primary_lang)
+            alternative_future = executor.submit(self.search_movie, title, alternative_lang)
+            primary_results = primary_future.result()
+            alternative_results = alternative_future.result()
+
+        if len(primary_results) < 3:
+            all_results = primary_results
+            existing_ids = {movie['id'] for movie in all_results}
+            new_results = [movie for movie in alternative_results
+                           if movie['id'] not in existing_ids]
+            all_results.extend(new_results)
+            return all_results
+
+        return primary_results
+
+    def search_movie(self, title: str, language: str) -> List[Dict]:
+        """
+        Search for movies using TMDB API with specified language
+        """
+        search_url = f"{self.base_url}/search/movie"
+        params = {
+            "api_key": self.api_key,
+            "query": title,
+            "language": language,
+            "include_adult": False
+        }
+        
+        try:
+            response = self.session.get(search_url, params=params)
+            response.raise_for_status()
+            return orjson.loads(response.content).get('results', [])
+        except Exception as e:
+            print(f"Error searching TMDB: {e}")
+            return []
+
+    def get_movie_details(self, tmdb_id: int, language: str = 'zh-CN') -> Optional[Dict]:
+        """
+        Get detailed movie information from TMDB
+        """
+        details_url = f"{self.base_url}/movie/{tmdb_id}"
+        params = {
+            "api_key": self.api_key,
+            "language": language,
+            "append_to_response": "credits"
+        }
+        
+        try:
+            response = self.session.get(details_url, params=params)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except Exception as e:
+            print(f"Error getting movie details: {e}")
+            return None
+
+class MultilingualMovieRecommender:
+    def __init__(self, movies_path: str, tmdb_api_key: str, use_hashing: bool = False):
+        """
+        Initialize the multilingual movie recommender system
+
+        :param use_hashing: vectorize text with a stateless HashingVectorizer
+            instead of TfidfVectorizer — no vocabulary dict is stored, which
+            roughly halves peak memory on large corpora
+        """
+        self.use_hashing = use_hashing
+        self.movies_path = movies_path
+        # Narrow dtypes at parse time: original_language repeats heavily
+        # (category interns each code once) and the numeric columns never
+        # need float64 precision, shrinking the resident DataFrame.
+        # Text-feature columns stay plain strings — they go through
+        # fillna('') before vectorization, which categories don't allow.
+        self.df = pd.read_csv(
+            movies_path,
+            dtype={
+                'original_language': 'category',
+                'year': 'Int16',
+                'vote_average': 'float32',
+                'vote_count': 'float32',
+                'popularity': 'float32',
+                'runtime': 'float32'
+            }
+        )
+        self.tmdb_searcher = TMDBSearcher(tmdb_api_key)
+        self.feature_vectors = {}
+        
+        self.text_weights = {
+            'genres': 0.20,
+            'keywords': 0.15,
+            'overview': 0.15,
+            'director': 0.10,
+            'top_actors': 0.10,
+            'production_companies': 0.05,
+            'production_countries': 0.05
+        }
+        
+        self.numeric_weights = {
+            'vote_average': 0.08,
+            'popularity': 0.05,
+            'runtime': 0.04,
+            'vote_count': 0.03
+        }
+        
+        self.stopwords = frozenset([
+            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
+            '的', '了', '和', '是', '就', '都', '而', '及', '与', '着',
+            '把', '让', '向', '在', '由', '这', '那', '到', '去', '又'
+        ])
+        
+        self.prepare_features()
+
+        # Flat ndarray copies of the filter columns so query-time threshold
+        # checks skip pandas Series overhead
+        self.vote_average_values = self.df['vote_average'].to_numpy(np.float32)
+        self.vote_count_values = self.df['vote_count'].to_numpy(np.float32)
+
+    def clean_mixed_text(self, text: str) -> str:
+        """
+        Clean and preprocess mixed language text
+        """
+        if not isinstance(text, str):
+            return ''
+        
+        text = PUNCTUATION_RE.sub(' ', text)
+        text = ENGLISH_RE.sub(lambda m: m.group(0).lower(), text)
+        return WHITESPACE_RE.sub(' ', text).strip()
+
+    def tokenize_mixed_text(self, text: str) -> str:
+        """
+        Tokenize text containing both Chinese and English
+        """
+        text = self.clean_mixed_text(text)
+
+        # Fast path: no Chinese characters means jieba has nothing to do
+        if not CHINESE_RE.search(text):
+            return ' '.join(w for w in text.split() if w not in self.stopwords)
+
+        english_words = LOWER_ENGLISH_RE.findall(text)
+        chinese_text = LOWER_ENGLISH_RE.sub('', text)
+        
+        chinese_words = jieba.cut(chinese_text)
+        
+        all_words = english_words + [w for w in chinese_words if w.strip()]
+        filtered_words = [w for w in all_words if w not in self.stopwords]
+        
+        return ' '.join(filtered_words)
+
+    def prepare_feature_text(self, feature_name: str) -> List[str]:
+        """
+        Prepare text feature for vectorization
+        """
+        texts = self.df[feature_name].fillna('')
+        
+        if feature_name in ['overview', 'keywords']:
+            return [self.tokenize_mixed_text(text) for text in texts]
+        else:
+            return [self.clean_mixed_text(text) for text in texts]
+
+    def build_text_feature(self, feature_name: str) -> Tuple[str, sparse.csr_matrix]:
+        """
+        Tokenize and vectorize a single text column, returning its
+        L2-normalized TF-IDF matrix
+        """
+        processed_texts = self.prepare_feature_text(feature_name)
+
+        if self.use_hashing:
+            hasher = HashingVectorizer(
+                analyzer='word',
+                token_pattern=r'(?u)\b\w+\b|[一-鿿]+',
+                n_features=2 ** 18,
+                alternate_sign=False,
+                norm=None,
+                dtype=np.float32
+            )
+            tfidf_matrix = TfidfTransformer().fit_transform(
+                hasher.transform(processed_texts)
+            )
+        else:
+            tfidf = TfidfVectorizer(
+                analyzer='word',
+                token_pattern=r'(?u)\b\w+\b|[一-鿿]+',
+                stop_words=None,
+                dtype=np.float32
+            )
+            tfidf_matrix = tfidf.fit_transform(processed_texts)
+
+        # L2-normalize rows once so cosine similarity reduces to a dot product
+        return feature_name, normalize(tfidf_matrix, norm='l2', axis=1, copy=False).tocsr()
+
+    def feature_cache_path(self) -> Optional[str]:
+        """
+        Cache file path keyed on the CSV's mtime and size, so a changed
+        dataset invalidates the cache automatically
+        """
+        try:
+            stat = os.stat(self.movies_path)
+        except OSError:
+            return None
+
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(self.movies_path)), '.cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        vectorizer_tag = 'hash' if self.use_hashing else 'tfidf'
+        return os.path.join(
+            cache_dir,
+            f'features_{vectorizer_tag}_{stat.st_mtime_ns}_{stat.st_size}.joblib'
+        )
+
+    def prepare_features(self):
+        """
+        Prepare and vectorize all features for similarity calculation,
+        reusing the on-disk cache when the dataset is unchanged
+        """
+        # Impute numeric NaNs unconditionally: the flat rating/vote arrays
+        # and the returned recommendation columns read self.df whether or
+        # not the vector cache hits, and warm starts must see the same
+        # imputed values as cold ones
+        for feature in self.numeric_weights.keys():
+            self.df[feature] = self.df[feature].fillna(self.df[feature].mean())
+
+        cache_path = self.feature_cache_path()
+        if cache_path and os.path.exists(cache_path):
+            try:
+                cached = joblib.load(cache_path)
+                self.feature_vectors = cached['feature_vectors']
+                self.text_matrix = cached['text_matrix']
+                self.text_matrix_T = cached['text_matrix_T']
+                self.numeric_matrix = cached['numeric_matrix']
+                self.numeric_weight_values = cached['numeric_weight_values']
+                print(f"Loaded prepared features from cache: {cache_path}")
+                return
+            except Exception as e:
+                print(f"Could not load feature cache ({e}), recomputing")
+
+        # The text columns are independent, so tokenize and vectorize them
+        # in parallel worker processes
+        results = joblib.Parallel(n_jobs=-1, backend='loky')(
+            joblib.delayed(self.build_text_feature)(feature)
+            for feature in self.text_weights.keys()
+        )
+        for feature, tfidf_matrix in results:
+            self.feature_vectors[feature] = tfidf_matrix
+
+        # Stack all text features into one pre-weighted matrix: scaling each
+        # block by sqrt(weight) makes a single dot product equal the weighted
+        # sum of per-feature cosine similarities
+        self.text_matrix = sparse.hstack([
+            np.sqrt(weight) * self.feature_vectors[feature]
+            for feature, weight in self.text_weights.items()
+        ]).tocsr()
+
+        # Transposed copy acts as an inverted index: multiplying a query row
+        # against it only visits movies sharing at least one term with the
+        # query instead of scanning all N rows
+        self.text_matrix_T = self.text_matrix.T.tocsr()
+
+        scaler = MinMaxScaler()
+        for feature in self.numeric_weights.keys():
+            scaled_values = scaler.fit_transform(self.df[feature].values.reshape(-1, 1))
+            self.feature_vectors[feature] = scaled_values
+
+        # Stack the scaled numeric columns so the query computes all four
+        # similarities in one broadcast instead of four separate passes
+        self.numeric_matrix = np.column_stack([
+            self.feature_vectors[feature].ravel()
+            for feature in self.numeric_weights.keys()
+        ]).astype(np.float32)
+        self.numeric_weight_values = np.array(
+            list(self.numeric_weights.values()), dtype=np.float32
+        )
+
+        if cache_path:
+            try:
+                joblib.dump({
+                    'feature_vectors': self.feature_vectors,
+                    'text_matrix': self.text_matrix,
+                    'text_matrix_T': self.text_matrix_T,
+                    'numeric_matrix': self.numeric_matrix,
+                    'numeric_weight_values': self.numeric_weight_values,
+                }, cache_path, compress=3)
+            except Exception as e:
+                print(f"Could not write feature cache: {e}")
+
+    def calculate_weighted_similarity(self, movie_idx: int) -> np.ndarray:
+        """
+        Calculate weighted similarity scores
+        """
+        # Rows are pre-normalized, so one sparse matvec over the inverted
+        # index yields the weighted cosine similarity for all text features,
+        # touching only movies that share a term with the query
+        query_row = self.text_matrix[movie_idx]
+        final_similarity = np.asarray(
+            query_row.dot(self.text_matrix_T).todense()
+        ).ravel()
+
+        # Single fused pass over all numeric features
+        numeric_diff = np.abs(self.numeric_matrix - self.numeric_matrix[movie_idx])
+        final_similarity += ((1 - numeric_diff) * self.numeric_weight_values).sum(axis=1)
+
+        return final_similarity
+
+    def find_movie_by_search(self, search_title: str) -> List[Tuple[Optional[int], Optional[str], Optional[int]]]:
+        """
+        Search for a movie using TMDB API and find all matching records in the dataset.
+
+        Returns a list of tuples containing:
+        - idx: The index of the movie in the local dataset (Optional[int])
+        - title: The title of the movie in the local dataset (Optional[str])
+        - tmdb_id: The TMDB ID of the movie (Optional[int])
+        """
+        print(f"\nSearching for '{search_title}'...")
+
+        search_results = self.tmdb_searcher.search_movie_multi_lang(search_title)
+
+        if not search_results:
+            print("No movies found on TMDB")
+            return []
+
+        matched_movies = []
+
+        for movie in search_results:
+            detected_lang = self.tmdb_searcher.detect_language(search_title)
+            movie_details = self.tmdb_searcher.get_movie_details(
+                movie['id'],
+                self.tmdb_searcher.language_map.get(detected_lang, 'en-US')
+            )
+
+            if not movie_details:
+                print(f"Could not get details for TMDB ID: {movie['id']}")
+                matched_movies.append((None, None, movie['id']))
+                continue
+
+            tmdb_id = movie['id']
+            dataset_match = self.df[self.df['tmdb_id'] == tmdb_id]
+
+            if not dataset_match.empty:
+                idx = dataset_match.index[0]
+                title = dataset_match.iloc[0]['title']
+                print(f"\nFound in dataset: {title}")
+                matched_movies.append((idx, title, tmdb_id))
+            else:
+                print(f"\nMovie not found in local dataset: TMDB ID {tmdb_id}")
+                matched_movies.append((None, None, tmdb_id))
+
+        return matched_movies
+
+    def get_movie_recommendations(self, search_title: str, n_recommendations: int = 5,
+                                  min_rating: float = None, min_votes: int = None) -> Optional[pd.DataFrame]:
+        """
+        Get movie recommendations based on search.
+        """
+        matched_movies = self.find_movie_by_search(search_title)
+
+        if not matched_movies:
+            print("Cannot generate recommendations: no movies found in search")
+            return None
+
+
+        best_match = matched_movies[0]
+        movie_idx, actual_title, tmdb_id = best_match
+
+        if movie_idx is None:
+            print("Cannot generate recommendations: best match not found in dataset")
+            return None
+
+        similarity_scores = self.calculate_weighted_similarity(movie_idx)
+
+        eligible = np.ones(len(self.df), dtype=bool)
+        if min_rating is not None:
+            eligible &= self.vote_average_values >= min_rating
+        if min_votes is not None:
+            eligible &= self.vote_count_values >= min_votes
+        eligible[movie_idx] = False
+
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) == 0:
+            print("No movies satisfy the rating/vote filters")
+            return None
+
+        # O(N) partial selection of the top k scores over the eligible
+        # subset only, then sort just those k — no full-length mask multiply
+        candidate_scores = similarity_scores[candidates]
+        k = min(n_recommendations, len(candidates))
+        top_k = np.argpartition(-candidate_scores, k - 1)[:k]
+        top_k = top_k[np.argsort(-candidate_scores[top_k])]
+        similar_indices = candidates[top_k]
+
+        # One fancy-index over the DataFrame instead of one per column;
+        # similar_indices is already in descending score order
+        rows = self.df.iloc[similar_indices]
+        columns = [
+            'tmdb_id', 'title', 'year', 'genres', 'director', 'top_actors',
+            'vote_average', 'vote_count', 'runtime'
+        ]
+        # the enricher writes poster_path with the dataset; carry it so the
+        # frontend can build poster URLs without a second TMDB call
+        if 'poster_path' in rows.columns:
+            columns.append('poster_path')
+        recommendations = rows[columns].copy()
+        recommendations['similarity_score'] = similarity_scores[similar_indices]
+
+        return recommendations
+
+def main():
+    TMDB_API_KEY = "b32b227102e481fb8a48b5f68065a3b9"
+
+    # Only the standalone CLI runs jieba in parallel mode: it forks a
+    # process pool, which is unsafe inside multithreaded importers like
+    # the Streamlit app and redundant inside the loky feature workers
+    try:
+        jieba.enable_parallel()
+    except NotImplementedError:
+        pass
+
+    try:
+        recommender = MultilingualMovieRecommender(
+            movies_path='Data\enriched_movies.csv',
+            tmdb_api_key=TMDB_API_KEY
+        )
+        
+        while True:
+            search_title = input("\nEnter movie title (or 'quit' to exit): ")
+            if search_title.lower() == 'quit':
+                break
+                
+            recommendations = recommender.get_movie_recommendations(
+                search_title=search_title,
+                n_recommendations=5,
+                min_rating=7.0,
+                min_votes=1000
+            )
+            
+            if recommendations is not None:
+                print("\nTop 5 recommendations:")
+                print(recommendations.to_string(index=False))
+            
+            print("\n" + "="*80)
+        
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,44 @@
+import io
+import os
+
+import joblib
 import pandas as pd
 import numpy as np
 from scipy.sparse import csr_matrix
 from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
 from typing import Optional, List, Dict, Tuple
 
+try:
+    import numba
+    from numba import prange
+except ImportError:
+    numba = None
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_similarities_csr(indptr, indices, data, row_norms, query):
+        """
+        Dot product of a dense query vector against every CSR row,
+        divided by the cached row norms
+        """
+        n_rows = indptr.shape[0] - 1
+        sims = np.zeros(n_rows)
+        for i in prange(n_rows):
+            dot = 0.0
+            for j in range(indptr[i], indptr[i + 1]):
+                dot += data[j] * query[indices[j]]
+            if row_norms[i] > 0.0:
+                sims[i] = dot / row_norms[i]
+        return sims
+
+
 class KNNMovieRecommender:
     def __init__(self, ratings_path: str, n_neighbors: int = 10, min_ratings: int = 5):
         """
@@ -15,21 +50,94 @@ class KNNMovieRecommender:
         """
         self.n_neighbors = n_neighbors
         self.min_ratings = min_ratings
-        self.ratings_df = self.load_ratings(ratings_path)
-        
+        self.ratings_path = ratings_path
+
         # Create matrices and mappings
         self.movie_user_matrix = None
         self.user_mapping = None
         self.movie_mapping = None
         self.reverse_movie_mapping = None
         self.movie_stats = None
-        
+
         # Initialize KNN model
         self.knn_model = None
-        
-        # Prepare data
-        self.prepare_data()
-        self.train_model()  # Now this method exists
+
+        # Prepare data, skipping the ratings parse and matrix build when a
+        # cached snapshot for this ratings file exists
+        if not self.load_cached_data():
+            self.ratings_df = self.load_ratings(ratings_path)
+            self.prepare_data()
+            self.save_cached_data()
+        self.train_model()
+
+    def data_cache_path(self) -> Optional[str]:
+        """
+        Cache file path keyed on the ratings file's mtime and size plus the
+        min_ratings filter, so either changing invalidates the cache
+        """
+        try:
+            stat = os.stat(self.ratings_path)
+        except OSError:
+            return None
+
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(self.ratings_path)), '.cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        return os.path.join(
+            cache_dir,
+            f'knn_{stat.st_mtime_ns}_{stat.st_size}_{self.min_ratings}.joblib'
+        )
+
+    def ann_index_path(self) -> Optional[str]:
+        """
+        HNSW index cache path, keyed like the data cache
+        """
+        cache_path = self.data_cache_path()
+        if not cache_path:
+            return None
+        return cache_path.replace('.joblib', '_ann.bin')
+
+    def load_cached_data(self) -> bool:
+        """
+        Restore prepared matrices and mappings from disk; returns True on hit
+        """
+        cache_path = self.data_cache_path()
+        if not cache_path or not os.path.exists(cache_path):
+            return False
+
+        try:
+            cached = joblib.load(cache_path)
+        except Exception as e:
+            print(f"Could not load KNN data cache ({e}), recomputing")
+            return False
+
+        self.movie_user_matrix = cached['movie_user_matrix']
+        self.user_mapping = cached['user_mapping']
+        self.movie_mapping = cached['movie_mapping']
+        self.reverse_movie_mapping = cached['reverse_movie_mapping']
+        self.movie_stats = cached['movie_stats']
+        self.all_movie_ids = cached['all_movie_ids']
+        print(f"Loaded prepared KNN data from cache: {cache_path}")
+        return True
+
+    def save_cached_data(self):
+        """
+        Persist prepared matrices and mappings for the next cold start
+        """
+        cache_path = self.data_cache_path()
+        if not cache_path:
+            return
+
+        try:
+            joblib.dump({
+                'movie_user_matrix': self.movie_user_matrix,
+                'user_mapping': self.user_mapping,
+                'movie_mapping': self.movie_mapping,
+                'reverse_movie_mapping': self.reverse_movie_mapping,
+                'movie_stats': self.movie_stats,
+                'all_movie_ids': self.all_movie_ids,
+            }, cache_path, compress=3)
+        except Exception as e:
+            print(f"Could not write KNN data cache: {e}")
 
     def train_model(self):
         """
@@ -37,28 +145,113 @@ class KNNMovieRecommender:
         """
         print("\nTraining KNN model...")
         try:
-            self.knn_model = NearestNeighbors(
-                n_neighbors=min(self.n_neighbors + 1, self.movie_user_matrix.shape[0]),
-                metric='cosine',
-                algorithm='brute'
-            )
-            self.knn_model.fit(self.movie_user_matrix)
+            # Rows were L2-normalized in prepare_data, so every norm is 1
+            # (or 0 for empty rows) and cosine reduces to a dot product
+            self.row_norms = np.ones(self.movie_user_matrix.shape[0])
+
+            if hnswlib is not None:
+                # Approximate index: O(log N) per query instead of brute
+                # O(N * d), at a small recall cost
+                n_movies, n_users = self.movie_user_matrix.shape
+                index_path = self.ann_index_path()
+                self.ann_index = hnswlib.Index(space='cosine', dim=n_users)
+
+                # Densifying the matrix and rebuilding the graph dominate
+                # cold start, so reload the serialized index when the
+                # ratings file is unchanged
+                loaded = False
+                if index_path and os.path.exists(index_path):
+                    try:
+                        self.ann_index.load_index(index_path, max_elements=n_movies)
+                        loaded = True
+                        print(f"Loaded HNSW index from cache: {index_path}")
+                    except Exception as e:
+                        print(f"Could not load HNSW index cache ({e}), rebuilding")
+                        self.ann_index = hnswlib.Index(space='cosine', dim=n_users)
+
+                if not loaded:
+                    print("Building HNSW index for approximate neighbor search")
+                    self.ann_index.init_index(max_elements=n_movies, ef_construction=200, M=16)
+                    self.ann_index.add_items(self.movie_user_matrix.toarray())
+                    if index_path:
+                        try:
+                            self.ann_index.save_index(index_path)
+                        except Exception as e:
+                            print(f"Could not write HNSW index cache: {e}")
+
+                self.ann_index.set_ef(max(50, self.n_neighbors * 4))
+                self.knn_model = None
+            elif numba is not None:
+                print("Using numba-accelerated cosine kernel")
+                self.ann_index = None
+                self.knn_model = None
+            else:
+                self.ann_index = None
+                # On unit vectors cos = 1 - ||a - b||^2 / 2, so euclidean
+                # distance gives the same ranking without norm recomputation
+                self.knn_model = NearestNeighbors(
+                    n_neighbors=min(self.n_neighbors + 1, self.movie_user_matrix.shape[0]),
+                    metric='euclidean',
+                    algorithm='brute'
+                )
+                self.knn_model.fit(self.movie_user_matrix)
             print("KNN model training completed")
         except Exception as e:
             print(f"Error training KNN model: {e}")
             raise
 
+    def find_nearest_neighbors(self, movie_idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find nearest neighbors of a movie, returning (indices, similarities)
+        sorted by decreasing similarity (the movie itself comes first)
+        """
+        k = min(self.n_neighbors + 1, self.movie_user_matrix.shape[0])
+
+        if self.ann_index is not None:
+            query = np.asarray(self.movie_user_matrix[movie_idx].todense())
+            labels, distances = self.ann_index.knn_query(query, k=k)
+            return labels.flatten(), 1 - distances.flatten()
+
+        if numba is not None:
+            query = np.asarray(self.movie_user_matrix[movie_idx].todense()).ravel()
+            similarities = _cosine_similarities_csr(
+                self.movie_user_matrix.indptr,
+                self.movie_user_matrix.indices,
+                self.movie_user_matrix.data,
+                self.row_norms,
+                query
+            )
+            top_k = np.argpartition(-similarities, k - 1)[:k]
+            top_k = top_k[np.argsort(-similarities[top_k])]
+            return top_k, similarities[top_k]
+
+        # A CSR row slice is already shape (1, n_users); no reshape needed
+        distances, indices = self.knn_model.kneighbors(
+            self.movie_user_matrix[movie_idx]
+        )
+        # Convert euclidean distance on unit vectors back to cosine similarity
+        return indices.flatten(), 1 - distances.flatten() ** 2 / 2
+
     def load_ratings(self, filepath: str) -> pd.DataFrame:
         """
         Load ratings data from file
         """
         try:
-            # Load ratings data
-            ratings = pd.read_csv(filepath, 
-                                sep='::', 
+            # Rewrite the '::' separator to tabs in memory so pandas can use
+            # its C parser instead of the much slower Python engine
+            with open(filepath, 'rb') as f:
+                buffer = io.BytesIO(f.read().replace(b'::', b'\t'))
+
+            # movie_id stays a string to preserve the IMDB-style zero padding
+            ratings = pd.read_csv(buffer,
+                                sep='\t',
                                 names=['user_id', 'movie_id', 'rating', 'timestamp'],
-                                engine='python')
-            
+                                engine='c',
+                                dtype={'user_id': np.int32,
+                                       'movie_id': str,
+                                       'rating': np.float32,
+                                       'timestamp': np.int64})
+
             # Print sample of movie IDs for debugging
             print("\nSample of movie IDs from dataset:")
             print(ratings['movie_id'].head())
@@ -69,10 +262,7 @@ class KNNMovieRecommender:
             print(f"Unique movies: {ratings['movie_id'].nunique()}")
             print(f"Unique users: {ratings['user_id'].nunique()}")
             print(f"Movie ID type: {ratings['movie_id'].dtype}")
-            
-            # Convert movie_id to string if it's not already
-            ratings['movie_id'] = ratings['movie_id'].astype(str)
-            
+
             return ratings
             
         except Exception as e:
@@ -116,16 +306,22 @@ class KNNMovieRecommender:
         self.movie_mapping = {movie: idx for idx, movie in enumerate(unique_movies)}
         self.reverse_movie_mapping = {idx: movie for movie, idx in self.movie_mapping.items()}
         
-        # Create movie-user matrix
-        rows = [self.movie_mapping[movie] for movie in ratings_filtered['movie_id']]
-        cols = [self.user_mapping[user] for user in ratings_filtered['user_id']]
-        data = ratings_filtered['rating'].values
+        # Create movie-user matrix (vectorized hash lookup instead of a
+        # Python loop over every rating row)
+        rows = ratings_filtered['movie_id'].map(self.movie_mapping).to_numpy()
+        cols = ratings_filtered['user_id'].map(self.user_mapping).to_numpy()
+        # float32 halves the bytes the cosine kernel has to stream per query
+        data = ratings_filtered['rating'].to_numpy(dtype=np.float32)
         
         self.movie_user_matrix = csr_matrix(
             (data, (rows, cols)),
             shape=(len(unique_movies), len(unique_users))
         )
-        
+
+        # L2-normalize rows once so cosine similarity becomes a plain dot
+        # product — no per-query norm divisions or sqrt
+        normalize(self.movie_user_matrix, norm='l2', axis=1, copy=False)
+
         print(f"Created matrix with shape: {self.movie_user_matrix.shape}")
 
     def standardize_movie_id(self, movie_id: str) -> str:
@@ -176,18 +372,13 @@ class KNNMovieRecommender:
         try:
             # Get movie index
             movie_idx = self.movie_mapping[movie_id]
-            
+
             # Find nearest neighbors
-            distances, indices = self.knn_model.kneighbors(
-                self.movie_user_matrix[movie_idx].reshape(1, -1)
-            )
-            
-            # Convert distances to similarities
-            similarities = 1 - distances.flatten()
-            
+            indices, similarities = self.find_nearest_neighbors(movie_idx)
+
             # Get similar movies (excluding the input movie)
             recommendations = []
-            for idx, similarity in zip(indices.flatten()[1:], similarities[1:]):
+            for idx, similarity in zip(indices[1:], similarities[1:]):
                 rec_movie_id = self.reverse_movie_mapping[idx]
                 avg_rating = self.movie_stats.loc[rec_movie_id, 'mean_rating']
                 num_ratings = self.movie_stats.loc[rec_movie_id, 'count']
@@ -1,9 +1,17 @@
+from io import BytesIO
+
 import pandas as pd
 import numpy as np
 from scipy.sparse import csr_matrix
 from sklearn.neighbors import NearestNeighbors
 from difflib import get_close_matches
 
+try:
+    from rapidfuzz import fuzz
+    from rapidfuzz import process as fuzz_process
+except ImportError:
+    fuzz_process = None
+
 class CFMovieRecommender:
     def __init__(self, movies_df, ratings_df, n_neighbers):
         self.movies_df = movies_df
@@ -13,16 +21,29 @@ class CFMovieRecommender:
         self.movie_user_mat = None
         self.movie_to_idx = None
         self.title_to_id = self._create_title_mapping()
-    
+        self.titles = list(self.title_to_id.keys())
+        self._match_cache = {}
+
     def _create_title_mapping(self):
         titles = self.movies_df['title_year'].apply(lambda x: x.rsplit(' (', 1)[0].lower())
         return dict(zip(titles, self.movies_df['movie_id']))
-    
+
     def find_movie_id(self, title):
         title = title.lower()
-        titles = list(self.title_to_id.keys())
-        matches = get_close_matches(title, titles, n=3, cutoff=0.6)
-        return [(match, self.title_to_id[match]) for match in matches]
+        if title in self._match_cache:
+            return self._match_cache[title]
+
+        if fuzz_process is not None:
+            # C-backed matcher, far faster than difflib's pure-Python scan
+            matches = [match for match, score, _ in fuzz_process.extract(
+                title, self.titles, scorer=fuzz.WRatio, limit=3, score_cutoff=60
+            )]
+        else:
+            matches = get_close_matches(title, self.titles, n=3, cutoff=0.6)
+
+        result = [(match, self.title_to_id[match]) for match in matches]
+        self._match_cache[title] = result
+        return result
     
     def preprocess(self, min_ratings=10):
         # 使用groupby统计每部电影的评分数
@@ -36,10 +57,12 @@ class CFMovieRecommender:
         rows = filtered_ratings['movie_id'].astype('category').cat.codes
         cols = filtered_ratings['user_id'].astype('category').cat.codes
         self.movie_to_idx = dict(zip(filtered_ratings['movie_id'].unique(), range(len(valid_movies))))
+        # 预先构建反向映射，避免每次推荐时重建整个列表
+        self.idx_to_movie = np.array(list(self.movie_to_idx))
         
         # 创建稀疏矩阵
         self.movie_user_mat = csr_matrix(
-            (filtered_ratings['rating'], (rows, cols)),
+            (filtered_ratings['rating'].to_numpy(dtype=np.float32), (rows, cols)),
             shape=(len(valid_movies), len(filtered_ratings['user_id'].unique()))
         )
     
@@ -56,13 +79,13 @@ class CFMovieRecommender:
             return pd.DataFrame()
             
         idx = self.movie_to_idx[movie_id]
+        # CSR行切片本身就是(1, n_users)形状，不需要reshape
         distances, indices = self.model.kneighbors(
-            self.movie_user_mat[idx].reshape(1, -1),
+            self.movie_user_mat[idx],
             n_neighbors=self.n_neighbers+1
         )
-        
-        movie_indices = list(self.movie_to_idx.keys())
-        similar_movies = [movie_indices[idx] for idx in indices.flatten()[1:]]
+
+        similar_movies = self.idx_to_movie[indices.flatten()[1:]]
         similarities = distances.flatten()[1:]
         
         recommendations = self.movies_df[
@@ -71,25 +94,25 @@ class CFMovieRecommender:
         recommendations['similarity'] = similarities
         return recommendations
 
+def _read_double_colon_csv(path, names, **kwargs):
+    # 先把'::'分隔符替换成制表符，让pandas走C解析器（比python引擎快5-10倍）
+    with open(path, 'rb') as f:
+        buffer = BytesIO(f.read().replace(b'::', b'\t'))
+    return pd.read_csv(buffer, sep='\t', engine='c', names=names, **kwargs)
+
 def load_dat_files(movies_path, ratings_path):
-    movies_df = pd.read_csv(
-        movies_path, 
-        sep='::', 
-        engine='python',
+    movies_df = _read_double_colon_csv(
+        movies_path,
         names=['movie_id', 'title_year', 'genres'],
         encoding='latin-1'
     )
-    
-    # 分块读取评分数据以减少内存使用
-    ratings_df = pd.read_csv(
+
+    ratings_df = _read_double_colon_csv(
         ratings_path,
-        sep='::',
-        engine='python',
         names=['user_id', 'movie_id', 'rating', 'timestamp'],
-        chunksize=1000000  # 每次读取100万行
+        dtype={'user_id': np.int32, 'rating': np.float32, 'timestamp': np.int64}
     )
-    ratings_df = pd.concat(ratings_df, ignore_index=True)
-    
+
     return movies_df, ratings_df
 
 def main():
@@ -1,282 +1,587 @@
-import requests
-import pandas as pd
-import time
-import logging
-from typing import List, Dict, Optional
-
-class TMDbEnricher:
-    def __init__(self, api_key: str):
-        """
-        初始化TMDb数据丰富器
-        
-        :param api_key: TMDb API密钥
-        """
-        self.base_url = "https://api.themoviedb.org/3"
-        self.api_key = api_key
-        
-        # 配置日志
-        logging.basicConfig(
-            level=logging.INFO, 
-            format='%(asctime)s - %(levelname)s: %(message)s',
-            filename='movie_enricher.log',
-            filemode='w'
-        )
-        self.logger = logging.getLogger()
-
-    def validate_api_key(self) -> bool:
-        """
-        验证API密钥是否可用
-        
-        :return: 是否验证成功
-        """
-        try:
-            # 使用一个简单的端点进行验证
-            validation_url = f"{self.base_url}/configuration"
-            params = {
-                "api_key": self.api_key
-            }
-            response = requests.get(validation_url, params=params)
-            
-            # 检查响应状态码
-            if response.status_code == 200:
-                self.logger.info("API密钥验证成功")
-                print("✅ API密钥验证成功")
-                return True
-            elif response.status_code == 401:
-                self.logger.error("API密钥无效，请检查您的凭据")
-                print("❌ API密钥无效，请检查您的凭据")
-                return False
-            else:
-                self.logger.error(f"API验证出现异常：状态码 {response.status_code}")
-                print(f"❓ API验证出现异常：状态码 {response.status_code}")
-                return False
-                
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"验证API密钥时网络错误: {e}")
-            print(f"❌ 网络错误：{e}")
-            return False
-        except Exception as e:
-            self.logger.error(f"验证API密钥时发生未知错误: {e}")
-            print(f"❌ 未知错误：{e}")
-            return False
-
-    def api_key_check(self) -> bool:
-        """
-        提供更详细的API密钥检查和指导
-        
-        :return: 是否可以继续处理
-        """
-        print("\n--- TMDb API 密钥检查 ---")
-        
-        # 检查密钥是否为空
-        if not self.api_key or self.api_key.strip() == "your_tmdb_api_key_here":
-            print("❌ 错误：未设置API密钥")
-            print("请按以下步骤操作：")
-            print("1. 访问 https://www.themoviedb.org/documentation/api")
-            print("2. 注册并获取API密钥")
-            print("3. 将密钥替换脚本中的 'your_tmdb_api_key_here'\n")
-            return False
-        
-        # 验证API密钥
-        return self.validate_api_key()
-
-    def parse_movie_dataset(self, file_path: str) -> pd.DataFrame:
-        """
-        解析原始电影数据集
-        
-        :param file_path: 数据集文件路径
-        :return: DataFrame包含movie_id, title, year, genres
-        """
-        def parse_line(line: str) -> Dict:
-            parts = line.strip().split('::')
-            movie_id = parts[0]
-            title_year = parts[1].split('(')
-            title = title_year[0].strip()
-            year = title_year[1].rstrip(')').strip()
-            genres = parts[2].split('|')
-            return {
-                'movie_id': movie_id,
-                'title': title,
-                'year': year,
-                'genres': genres
-            }
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            movies = [parse_line(line) for line in f]
-        
-        return pd.DataFrame(movies)
-
-    def search_movie(self, title: str, year: str) -> Optional[Dict]:
-        """
-        通过标题和年份搜索电影
-        
-        :param title: 电影标题
-        :param year: 电影年份
-        :return: 匹配的电影信息或None
-        """
-        search_url = f"{self.base_url}/search/movie"
-        params = {
-            "api_key": self.api_key,
-            "query": title,
-            "year": year,
-            "language": "zh-CN"
-        }
-        
-        try:
-            response = requests.get(search_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # 增加调试日志
-            self.logger.info(f"搜索结果 for {title} ({year}): {len(data.get('results', []))} 匹配")
-            
-            # 如果有多个结果，选择最匹配的一个
-            if data.get('results'):
-                # 尝试找到年份最接近的
-                best_match = min(
-                    data['results'], 
-                    key=lambda x: abs(int(x.get('release_date', '0')[:4]) - int(year))
-                )
-                return best_match
-            
-            return None
-            
-        except requests.RequestException as e:
-            self.logger.error(f"搜索 {title} 时出错: {e}")
-            return None
-        except Exception as e:
-            self.logger.error(f"解析搜索结果时出错 {title}: {e}")
-            return None
-
-    def get_movie_details(self, movie_id: int) -> Optional[Dict]:
-        """
-        获取电影详细信息
-        
-        :param movie_id: TMDb电影ID
-        :return: 电影详细信息
-        """
-        try:
-            # 获取基本详情和演职员表
-            details_url = f"{self.base_url}/movie/{movie_id}"
-            params = {
-                "api_key": self.api_key,
-                "language": "zh-CN",
-                "append_to_response": "credits,keywords"
-            }
-            
-            response = requests.get(details_url, params=params)
-            response.raise_for_status()
-            
-            return response.json()
-            
-        except requests.RequestException as e:
-            self.logger.error(f"获取电影详情时出错 (ID: {movie_id}): {e}")
-            return None
-
-    def get_director(self, credits: Dict) -> str:
-        """
-        从演员表中获取导演姓名
-        
-        :param credits: 电影演员表信息
-        :return: 导演姓名
-        """
-        directors = [crew['name'] for crew in credits.get('crew', []) if crew['job'] == 'Director']
-        return directors[0] if directors else ''
-
-    def get_top_actors(self, credits: Dict, top_n: int = 5) -> List[str]:
-        """
-        获取前N名主要演员
-        
-        :param credits: 电影演员表信息
-        :param top_n: 返回演员数量
-        :return: 演员姓名列表
-        """
-        actors = sorted(
-            [actor for actor in credits.get('cast', []) if actor['known_for_department'] == 'Acting'],
-            key=lambda x: x.get('popularity', 0),
-            reverse=True
-        )
-        return [actor['name'] for actor in actors[:top_n]]
-
-    def enrich_movie_dataset(self, dataset_path: str, output_path: str):
-        """
-        丰富电影数据集
-        
-        :param dataset_path: 原始数据集路径
-        :param output_path: 输出丰富后的数据集路径
-        """
-        # 首先检查API密钥
-        if not self.api_key_check():
-            print("❌ 无法继续处理，请先解决API密钥问题")
-            return
-
-        movies_df = self.parse_movie_dataset(dataset_path)
-        enriched_movies = []
-
-        total_movies = len(movies_df)
-        print(f"\n开始处理 {total_movies} 部电影")
-
-        for idx, movie in movies_df.iterrows():
-            try:
-                # 添加延迟以避免触发API速率限制
-                if idx > 0 and idx % 20 == 0:
-                    time.sleep(1)  # 每20个电影暂停1秒
-                    print(f"处理进度: {idx}/{total_movies}")
-
-                search_result = self.search_movie(movie['title'], movie['year'])
-                
-                if search_result:
-                    details = self.get_movie_details(search_result['id'])
-                    
-                    if details:
-                        enriched_movie = {
-                            **movie,
-                            'tmdb_id': search_result['id'],
-                            'overview': details.get('overview', ''),
-                            'vote_average': details.get('vote_average', 0),
-                            'vote_count': details.get('vote_count', 0),
-                            'popularity': details.get('popularity', 0),
-                            'original_language': details.get('original_language', ''),
-                            'runtime': details.get('runtime', 0),  # 电影时长（分钟）
-                            'production_countries': ', '.join([country['name'] for country in details.get('production_countries', [])]),
-                            'production_companies': ', '.join([company['name'] for company in details.get('production_companies', [])]),
-                            'director': self.get_director(details.get('credits', {})) if details.get('credits') else '',
-                            'top_actors': ', '.join(self.get_top_actors(details.get('credits', {})) if details.get('credits') else []),
-                            'keywords': ', '.join([keyword['name'] for keyword in details.get('keywords', {}).get('keywords', [])])
-                        }
-                        enriched_movies.append(enriched_movie)
-                        self.logger.info(f"丰富成功: {movie['title']} ({movie['year']})")
-                    else:
-                        self.logger.warning(f"无法获取详细信息: {movie['title']} ({movie['year']})")
-                else:
-                    self.logger.warning(f"未找到: {movie['title']} ({movie['year']})")
-            
-            except Exception as e:
-                self.logger.error(f"处理 {movie['title']} 时出错: {e}")
-
-        # 保存结果
-        if enriched_movies:
-            enriched_df = pd.DataFrame(enriched_movies)
-            enriched_df.to_csv(output_path, index=False, encoding='utf-8-sig')
-            print(f"\n✅ 处理完成！")
-            print(f"- 总计处理: {total_movies} 部电影")
-            print(f"- 成功丰富: {len(enriched_movies)} 部电影")
-            print(f"- 结果保存至: {output_path}")
-            self.logger.info(f"丰富后的数据集已保存到 {output_path}")
-        else:
-            print("\n❌ 没有成功处理任何电影数据")
-
-def main():
-    # 请替换为您的TMDb API密钥
-    API_KEY = "b32b227102e481fb8a48b5f68065a3b9"
-    
-    enricher = TMDbEnricher(API_KEY)
-    
-    enricher.enrich_movie_dataset(
-        dataset_path='Data\movies.dat', 
-        output_path='Data\enriched_movies.csv'
-    )
-
-if __name__ == "__main__":
+import asyncio
+import csv
+import heapq
+import os
+import shelve
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import httpx
+import orjson
+
+try:
+    # httpx only speaks HTTP/2 when the optional h2 extra is present;
+    # probe once and fall back to HTTP/1.1 instead of raising at runtime
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import pandas as pd
+import logging
+from typing import List, Dict, Optional
+
+
+class AsyncTokenBucket:
+    """
+    异步令牌桶限速器：在滑动窗口内最多放行rate个请求。
+    桶里有余量时立即放行，只在真正触顶时等待——
+    比固定sleep更贴合TMDb的40请求/10秒配额
+    """
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self._timestamps = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.period:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.rate:
+                    self._timestamps.append(now)
+                    return
+                await asyncio.sleep(self.period - (now - self._timestamps[0]))
+
+class TokenBucket:
+    """
+    AsyncTokenBucket的线程版：同一个40请求/10秒滑动窗口配额，
+    供线程池降级路径在每次请求前acquire
+    """
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.period:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.rate:
+                    self._timestamps.append(now)
+                    return
+                wait = self.period - (now - self._timestamps[0])
+            time.sleep(wait)
+
+class TMDbEnricher:
+    # 输出CSV的列顺序，流式写入时每行按此对齐
+    OUTPUT_COLUMNS = [
+        'movie_id', 'title', 'year', 'genres', 'tmdb_id', 'overview',
+        'vote_average', 'vote_count', 'popularity', 'original_language',
+        'runtime', 'production_countries', 'production_companies',
+        'director', 'top_actors', 'keywords', 'poster_path', 'trailer_key'
+    ]
+
+    def __init__(self, api_key: str):
+        """
+        初始化TMDb数据丰富器
+        
+        :param api_key: TMDb API密钥
+        """
+        self.base_url = "https://api.themoviedb.org/3"
+        self.api_key = api_key
+
+        # 同步路径复用一个带连接池的会话，避免每次请求重新TLS握手；
+        # 重试策略带退避，限速器漏掉的429不再直接变成异常丢行
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=[429, 500, 502, 503, 504])
+        ))
+
+        # 搜索结果落盘缓存：重跑丰富流程时跳过已解析过的电影。
+        # shelve的底层dbm不保证线程安全，线程池路径的读写都要持锁
+        self.search_cache = shelve.open('tmdb_search_cache')
+        self._cache_lock = threading.Lock()
+
+        # 客户端限速器，严格贴合TMDb的40请求/10秒配额
+        # （异步和线程两条路径各用各的桶）
+        self.rate_limiter = AsyncTokenBucket(40, 10.0)
+        self.sync_rate_limiter = TokenBucket(40, 10.0)
+
+        # 配置日志
+        logging.basicConfig(
+            level=logging.INFO, 
+            format='%(asctime)s - %(levelname)s: %(message)s',
+            filename='movie_enricher.log',
+            filemode='w'
+        )
+        self.logger = logging.getLogger()
+
+    def validate_api_key(self) -> bool:
+        """
+        验证API密钥是否可用
+        
+        :return: 是否验证成功
+        """
+        try:
+            # 使用一个简单的端点进行验证
+            validation_url = f"{self.base_url}/configuration"
+            params = {
+                "api_key": self.api_key
+            }
+            response = self.session.get(validation_url, params=params, timeout=10)
+            
+            # 检查响应状态码
+            if response.status_code == 200:
+                self.logger.info("API密钥验证成功")
+                print("✅ API密钥验证成功")
+                return True
+            elif response.status_code == 401:
+                self.logger.error("API密钥无效，请检查您的凭据")
+                print("❌ API密钥无效，请检查您的凭据")
+                return False
+            else:
+                self.logger.error(f"API验证出现异常：状态码 {response.status_code}")
+                print(f"❓ API验证出现异常：状态码 {response.status_code}")
+                return False
+                
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"验证API密钥时网络错误: {e}")
+            print(f"❌ 网络错误：{e}")
+            return False
+        except Exception as e:
+            self.logger.error(f"验证API密钥时发生未知错误: {e}")
+            print(f"❌ 未知错误：{e}")
+            return False
+
+    def api_key_check(self) -> bool:
+        """
+        提供更详细的API密钥检查和指导
+        
+        :return: 是否可以继续处理
+        """
+        print("\n--- TMDb API 密钥检查 ---")
+        
+        # 检查密钥是否为空
+        if not self.api_key or self.api_key.strip() == "your_tmdb_api_key_here":
+            print("❌ 错误：未设置API密钥")
+            print("请按以下步骤操作：")
+            print("1. 访问 https://www.themoviedb.org/documentation/api")
+            print("2. 注册并获取API密钥")
+            print("3. 将密钥替换脚本中的 'your_tmdb_api_key_here'\n")
+            return False
+        
+        # 验证API密钥
+        return self.validate_api_key()
+
+    def parse_movie_dataset(self, file_path: str) -> pd.DataFrame:
+        """
+        解析原始电影数据集（全程走pandas的向量化C内核，
+        不再逐行在Python里split）
+
+        :param file_path: 数据集文件路径
+        :return: DataFrame包含movie_id, title, year, genres
+        """
+        # 把'::'分隔符替换成制表符，让pandas用C解析器读取
+        with open(file_path, 'rb') as f:
+            buffer = BytesIO(f.read().replace(b'::', b'\t'))
+
+        df = pd.read_csv(
+            buffer,
+            sep='\t',
+            engine='c',
+            names=['movie_id', 'title_year', 'genres'],
+            dtype={'movie_id': str}
+        )
+
+        df[['title', 'year']] = df['title_year'].str.extract(r'^(.*)\s+\((\d{4})\)\s*$')
+        df['title'] = df['title'].str.strip()
+        df['genres'] = df['genres'].str.split('|')
+
+        return df[['movie_id', 'title', 'year', 'genres']]
+
+    async def search_movie(self, client: httpx.AsyncClient,
+                           title: str, year: str) -> Optional[Dict]:
+        """
+        通过标题和年份搜索电影
+
+        :param client: 共享的httpx异步客户端
+        :param title: 电影标题
+        :param year: 电影年份
+        :return: 匹配的电影信息或None
+        """
+        cache_key = f"{title}::{year}"
+        if cache_key in self.search_cache:
+            return self.search_cache[cache_key]
+
+        search_url = f"{self.base_url}/search/movie"
+        params = {
+            "api_key": self.api_key,
+            "query": title,
+            "year": year,
+            "language": "zh-CN"
+        }
+
+        try:
+            await self.rate_limiter.acquire()
+            response = await client.get(search_url, params=params)
+            response.raise_for_status()
+            # orjson的C解析器比stdlib json快数倍，详情响应可达几百KB
+            data = orjson.loads(response.content)
+
+            # 增加调试日志
+            self.logger.info(f"搜索结果 for {title} ({year}): {len(data.get('results', []))} 匹配")
+
+            # 如果有多个结果，选择最匹配的一个
+            best_match = self._pick_best_match(data.get('results'), year)
+
+            # 未命中也缓存，避免重跑时再次搜索
+            self.search_cache[cache_key] = best_match
+            return best_match
+
+        except httpx.HTTPError as e:
+            self.logger.error(f"搜索 {title} 时出错: {e}")
+            return None
+        except Exception as e:
+            self.logger.error(f"解析搜索结果时出错 {title}: {e}")
+            return None
+
+    @staticmethod
+    def _pick_best_match(results: Optional[List[Dict]], year: str) -> Optional[Dict]:
+        """
+        从搜索结果中选出年份最匹配的一条。
+        搜索端点已按year过滤，首个结果年份命中时直接采用；
+        只在年份不符且有多个候选时才做最近年份扫描
+        """
+        if not results:
+            return None
+
+        first = results[0]
+        if len(results) == 1 or first.get('release_date', '')[:4] == year:
+            return first
+
+        target_year = int(year)
+        return min(
+            results,
+            key=lambda x: abs(int(x.get('release_date', '0')[:4]) - target_year)
+        )
+
+    async def get_movie_details(self, client: httpx.AsyncClient,
+                                movie_id: int) -> Optional[Dict]:
+        """
+        获取电影详细信息
+
+        :param client: 共享的httpx异步客户端
+        :param movie_id: TMDb电影ID
+        :return: 电影详细信息
+        """
+        try:
+            # 获取基本详情和演职员表
+            details_url = f"{self.base_url}/movie/{movie_id}"
+            params = {
+                "api_key": self.api_key,
+                "language": "zh-CN",
+                "append_to_response": "credits,keywords,videos"
+            }
+
+            await self.rate_limiter.acquire()
+            response = await client.get(details_url, params=params)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+
+        except httpx.HTTPError as e:
+            self.logger.error(f"获取电影详情时出错 (ID: {movie_id}): {e}")
+            return None
+
+    def get_trailer_key(self, videos: Dict) -> str:
+        """
+        从videos附加响应中提取YouTube预告片key
+
+        :param videos: 电影videos信息
+        :return: YouTube视频key，无预告片时为空字符串
+        """
+        for video in videos.get('results', []):
+            if video.get('site') == 'YouTube' and video.get('type') == 'Trailer':
+                return video.get('key', '')
+        return ''
+
+    def get_director(self, credits: Dict) -> str:
+        """
+        从演员表中获取导演姓名
+        
+        :param credits: 电影演员表信息
+        :return: 导演姓名
+        """
+        # 生成器短路：找到第一位导演就返回，不构建完整列表
+        return next(
+            (crew['name'] for crew in credits.get('crew', ()) if crew.get('job') == 'Director'),
+            ''
+        )
+
+    def get_top_actors(self, credits: Dict, top_n: int = 5) -> List[str]:
+        """
+        获取前N名主要演员
+        
+        :param credits: 电影演员表信息
+        :param top_n: 返回演员数量
+        :return: 演员姓名列表
+        """
+        # heapq.nlargest只维护top_n个元素：O(N log top_n)，
+        # 且不物化完整的过滤列表
+        actors = heapq.nlargest(
+            top_n,
+            (actor for actor in credits.get('cast', ())
+             if actor.get('known_for_department') == 'Acting'),
+            key=lambda x: x.get('popularity', 0)
+        )
+        return [actor['name'] for actor in actors]
+
+    async def enrich_one(self, client: httpx.AsyncClient,
+                         semaphore: asyncio.Semaphore, movie: Dict) -> Optional[Dict]:
+        """
+        搜索并丰富单部电影，用信号量限制在途请求数
+
+        :param movie: 包含movie_id/title/year/genres的字典
+        :return: 丰富后的电影信息或None
+        """
+        async with semaphore:
+            try:
+                search_result = await self.search_movie(client, movie['title'], movie['year'])
+
+                if not search_result:
+                    self.logger.warning(f"未找到: {movie['title']} ({movie['year']})")
+                    return None
+
+                details = await self.get_movie_details(client, search_result['id'])
+
+                if not details:
+                    self.logger.warning(f"无法获取详细信息: {movie['title']} ({movie['year']})")
+                    return None
+
+                enriched_movie = self._build_enriched_row(movie, search_result, details)
+                self.logger.info(f"丰富成功: {movie['title']} ({movie['year']})")
+                return enriched_movie
+
+            except Exception as e:
+                self.logger.error(f"处理 {movie['title']} 时出错: {e}")
+                return None
+
+    def _build_enriched_row(self, movie: Dict, search_result: Dict, details: Dict) -> Dict:
+        """
+        把搜索结果和详情拼成输出CSV的一行（异步/线程两条路径共用）
+        """
+        return {
+            **movie,
+            'tmdb_id': search_result['id'],
+            'overview': details.get('overview', ''),
+            'vote_average': details.get('vote_average', 0),
+            'vote_count': details.get('vote_count', 0),
+            'popularity': details.get('popularity', 0),
+            'original_language': details.get('original_language', ''),
+            'runtime': details.get('runtime', 0),  # 电影时长（分钟）
+            'production_countries': ', '.join([country['name'] for country in details.get('production_countries', [])]),
+            'production_companies': ', '.join([company['name'] for company in details.get('production_companies', [])]),
+            'director': self.get_director(details.get('credits', {})) if details.get('credits') else '',
+            'top_actors': ', '.join(self.get_top_actors(details.get('credits', {})) if details.get('credits') else []),
+            'keywords': ', '.join([keyword['name'] for keyword in details.get('keywords', {}).get('keywords', [])]),
+            # 海报路径和预告片key随数据集落盘，前端不用再发第二次请求
+            'poster_path': details.get('poster_path', ''),
+            'trailer_key': self.get_trailer_key(details.get('videos', {}))
+        }
+
+    def enrich_one_sync(self, movie: Dict) -> Optional[Dict]:
+        """
+        同步丰富单部电影：requests在socket I/O期间释放GIL，
+        配合线程池即可并行，Session本身线程安全
+        """
+        try:
+            cache_key = f"{movie['title']}::{movie['year']}"
+            with self._cache_lock:
+                cache_hit = cache_key in self.search_cache
+                if cache_hit:
+                    search_result = self.search_cache[cache_key]
+
+            if not cache_hit:
+                self.sync_rate_limiter.acquire()
+                response = self.session.get(
+                    f"{self.base_url}/search/movie",
+                    params={
+                        "api_key": self.api_key,
+                        "query": movie['title'],
+                        "year": movie['year'],
+                        "language": "zh-CN"
+                    },
+                    timeout=10
+                )
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                search_result = self._pick_best_match(data.get('results'), movie['year'])
+                with self._cache_lock:
+                    self.search_cache[cache_key] = search_result
+
+            if not search_result:
+                self.logger.warning(f"未找到: {movie['title']} ({movie['year']})")
+                return None
+
+            self.sync_rate_limiter.acquire()
+            response = self.session.get(
+                f"{self.base_url}/movie/{search_result['id']}",
+                params={
+                    "api_key": self.api_key,
+                    "language": "zh-CN",
+                    "append_to_response": "credits,keywords,videos"
+                },
+                timeout=10
+            )
+            response.raise_for_status()
+            details = orjson.loads(response.content)
+
+            enriched_movie = self._build_enriched_row(movie, search_result, details)
+            self.logger.info(f"丰富成功: {movie['title']} ({movie['year']})")
+            return enriched_movie
+
+        except Exception as e:
+            self.logger.error(f"处理 {movie['title']} 时出错: {e}")
+            return None
+
+    def enrich_all_threaded(self, movies_df: pd.DataFrame, output_path: str,
+                            append: bool = False) -> int:
+        """
+        线程池版并发丰富：事件循环已被占用（如Jupyter/Streamlit内）
+        无法asyncio.run时的降级路径，写出行为与异步路径一致
+
+        :return: 成功丰富并写入的电影数量
+        """
+        enriched_count = 0
+
+        mode = 'a' if append else 'w'
+        with open(output_path, mode, newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=self.OUTPUT_COLUMNS, extrasaction='ignore')
+            if not append:
+                writer.writeheader()
+
+            with ThreadPoolExecutor(max_workers=20) as executor:
+                for enriched_movie in executor.map(self.enrich_one_sync, movies_df.to_dict('records')):
+                    if enriched_movie is not None:
+                        writer.writerow(enriched_movie)
+                        f.flush()
+                        enriched_count += 1
+
+        return enriched_count
+
+    async def enrich_all(self, movies_df: pd.DataFrame, output_path: str,
+                         append: bool = False) -> int:
+        """
+        并发丰富整个数据集，结果一完成就流式写入CSV：
+        内存占用恒定，中途崩溃也不丢失已完成的进度
+
+        :param append: 续跑时以追加模式打开输出文件，不重写表头
+        :return: 成功丰富并写入的电影数量
+        """
+        semaphore = asyncio.Semaphore(20)
+        enriched_count = 0
+
+        mode = 'a' if append else 'w'
+        with open(output_path, mode, newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=self.OUTPUT_COLUMNS, extrasaction='ignore')
+            if not append:
+                writer.writeheader()
+
+            # HTTP/2把所有并发请求复用到同一条TLS连接上，
+            # 省掉每连接的握手开销和文件描述符压力；
+            # 未安装h2时退回HTTP/1.1连接池
+            limits = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits, timeout=10.0) as client:
+                # to_dict('records')一次性物化所有行，避免iterrows逐行装箱Series
+                tasks = [
+                    self.enrich_one(client, semaphore, movie)
+                    for movie in movies_df.to_dict('records')
+                ]
+                for future in asyncio.as_completed(tasks):
+                    enriched_movie = await future
+                    if enriched_movie is not None:
+                        writer.writerow(enriched_movie)
+                        f.flush()
+                        enriched_count += 1
+
+        return enriched_count
+
+    def _output_header_matches(self, output_path: str) -> bool:
+        """
+        检查已有输出文件的表头是否等于当前OUTPUT_COLUMNS；
+        不一致（如旧版格式）时返回False，走全量重写
+        """
+        try:
+            with open(output_path, newline='', encoding='utf-8-sig') as f:
+                header = next(csv.reader(f), None)
+        except OSError:
+            return False
+
+        if header == self.OUTPUT_COLUMNS:
+            return True
+        print("已有输出文件的列与当前格式不一致，将全量重写")
+        return False
+
+    def enrich_movie_dataset(self, dataset_path: str, output_path: str):
+        """
+        丰富电影数据集
+
+        :param dataset_path: 原始数据集路径
+        :param output_path: 输出丰富后的数据集路径
+        """
+        # 首先检查API密钥
+        if not self.api_key_check():
+            print("❌ 无法继续处理，请先解决API密钥问题")
+            return
+
+        movies_df = self.parse_movie_dataset(dataset_path)
+
+        # 断点续跑：已写入输出CSV的电影直接跳过，只补齐缺失部分。
+        # 仅当已有文件的表头与当前OUTPUT_COLUMNS完全一致才追加——
+        # 旧版16列文件追加18字段行会把整个CSV写坏
+        append = False
+        if os.path.exists(output_path) and self._output_header_matches(output_path):
+            try:
+                done = set(pd.read_csv(output_path, usecols=['movie_id'], dtype=str)['movie_id'])
+            except (ValueError, pd.errors.EmptyDataError):
+                done = set()
+            if done:
+                before = len(movies_df)
+                movies_df = movies_df[~movies_df['movie_id'].isin(done)]
+                append = True
+                print(f"检测到已有输出，跳过 {before - len(movies_df)} 部已丰富的电影")
+
+        total_movies = len(movies_df)
+        print(f"\n开始处理 {total_movies} 部电影")
+
+        try:
+            enriched_count = asyncio.run(self.enrich_all(movies_df, output_path, append=append))
+        except RuntimeError:
+            # 当前线程已有事件循环在跑（如Jupyter/Streamlit），退回线程池路径
+            self.logger.info("事件循环被占用，改用线程池并行丰富")
+            enriched_count = self.enrich_all_threaded(movies_df, output_path, append=append)
+
+        if enriched_count:
+            print(f"\n✅ 处理完成！")
+            print(f"- 总计处理: {total_movies} 部电影")
+            print(f"- 成功丰富: {enriched_count} 部电影")
+            print(f"- 结果保存至: {output_path}")
+            self.logger.info(f"丰富后的数据集已保存到 {output_path}")
+        else:
+            print("\n❌ 没有成功处理任何电影数据")
+
+def main():
+    # 请替换为您的TMDb API密钥
+    API_KEY = "b32b227102e481fb8a48b5f68065a3b9"
+    
+    enricher = TMDbEnricher(API_KEY)
+    
+    enricher.enrich_movie_dataset(
+        dataset_path='Data\movies.dat', 
+        output_path='Data\enriched_movies.csv'
+    )
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,27 @@
+import os
+
 from CBFRS import MultilingualMovieRecommender
 from CFRS_n import CFMovieRecommender, load_dat_files
+import joblib
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 
+
+def cf_model_cache_path(ratings_path: str) -> Optional[str]:
+    """
+    CF模型缓存路径，以评分文件的mtime和大小作为key
+    """
+    try:
+        stat = os.stat(ratings_path)
+    except OSError:
+        return None
+
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(ratings_path)), '.cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, f'cf_model_{stat.st_mtime_ns}_{stat.st_size}.joblib')
+
+
 class ImprovedHybridRecommender:
     def __init__(self,
                  movies_path: str,
@@ -13,16 +31,46 @@ class ImprovedHybridRecommender:
             movies_path=movies_path,
             tmdb_api_key=tmdb_api_key
         )
+
+        # 优先从磁盘缓存恢复已拟合的CF推荐器，冷启动跳过评分解析和模型训练
+        cache_path = cf_model_cache_path(ratings_path)
+        self.cf_recommender = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                self.cf_recommender = joblib.load(cache_path)
+                print(f"已从缓存加载CF模型: {cache_path}")
+            except Exception as e:
+                print(f"CF模型缓存加载失败({e})，重新训练")
+
+        if self.cf_recommender is None:
+            # 加载数据并初始化CF推荐器（movies.dat与评分文件同目录，
+            # 避免大小写硬编码在区分大小写的文件系统上找不到Data/）
+            movies_dat_path = os.path.join(os.path.dirname(ratings_path), 'movies.dat')
+            self.movies_df, self.ratings_df = load_dat_files(movies_dat_path, ratings_path)
+            self.cf_recommender = CFMovieRecommender(self.movies_df, self.ratings_df, n_neighbers=10)
+            self.cf_recommender.preprocess(min_ratings=10)
+            self.cf_recommender.fit()
+            if cache_path:
+                try:
+                    joblib.dump(self.cf_recommender, cache_path, compress=3)
+                except Exception as e:
+                    print(f"CF模型缓存写入失败: {e}")
         
-        # 加载数据并初始化CF推荐器
-        self.movies_df, self.ratings_df = load_dat_files('data/movies.dat', 'data/ratings.dat')
-        self.cf_recommender = CFMovieRecommender(self.movies_df, self.ratings_df, n_neighbers=10)
-        self.cf_recommender.preprocess(min_ratings=10)
-        self.cf_recommender.fit()
-        
-        # 加载丰富数据集
-        self.enriched_df = pd.read_csv(movies_path)
-        
+        # 复用内容推荐器已解析好的丰富数据集，
+        # 同一份CSV不再读第二遍、也不在内存里存两份
+        self.enriched_df = self.content_recommender.df
+
+        # 标题→行的哈希索引：结果组装时O(1)取行，
+        # 不再对整个DataFrame做布尔掩码扫描
+        self._by_title = self.enriched_df.drop_duplicates('title', keep='first').set_index('title', drop=False)
+
+        # 预构建小写标题索引：热路径里O(1)精确命中，
+        # 不再对整个DataFrame做str.contains扫描
+        self._title_index = {
+            title.lower(): title
+            for title in self.enriched_df['title'].dropna()
+        }
+
         self.content_weight = 0.3
         self.cf_weight = 0.7
 
@@ -69,25 +117,18 @@ class ImprovedHybridRecommender:
                         if enriched_title:
                             cf_scores[enriched_title] = similarity
         
-        # 组合分数
-        combined_scores = {}
-        all_movies = set(content_based_scores.keys()) | set(cf_scores.keys())
-        
-        for movie in all_movies:
-            content_score = content_based_scores.get(movie, 0)
-            cf_score = cf_scores.get(movie, 0)
-            
-            combined_scores[movie] = (
-                self.content_weight * content_score +
-                self.cf_weight * cf_score
-            )
-        
+        # 组合分数：Series.add按标题自动对齐并集，缺失侧补0，
+        # 一次向量化运算代替set并集+逐电影dict查找
+        content_s = pd.Series(content_based_scores, dtype=float)
+        cf_s = pd.Series(cf_scores, dtype=float)
+        combined = (self.content_weight * content_s).add(self.cf_weight * cf_s, fill_value=0)
+
         # 创建推荐DataFrame
         recommendations = []
-        top_movies = sorted(combined_scores.items(), key=lambda x: x[1], reverse=True)[:n_recommendations]
-        
+        top_movies = combined.nlargest(n_recommendations).items()
+
         for movie_title, score in top_movies:
-            movie_data = self.enriched_df[self.enriched_df['title'] == movie_title].iloc[0]
+            movie_data = self._by_title.loc[movie_title]
             recommendations.append({
                 'title': movie_title,
                 'year': movie_data['year'],
@@ -96,17 +137,25 @@ class ImprovedHybridRecommender:
                 'vote_average': movie_data['vote_average'],
                 'content_score': content_based_scores.get(movie_title, 0),
                 'cf_score': cf_scores.get(movie_title, 0),
-                'combined_score': combined_scores[movie_title]
+                'combined_score': score
             })
         
         return pd.DataFrame(recommendations)
 
     def find_matching_title(self, partial_title: str) -> Optional[str]:
         """Find matching title in enriched dataset"""
-        matches = self.enriched_df[
-            self.enriched_df['title'].str.lower().str.contains(partial_title.lower())
-        ]
-        return matches['title'].iloc[0] if not matches.empty else None
+        partial = partial_title.lower()
+
+        # 精确命中直接走字典
+        exact = self._title_index.get(partial)
+        if exact is not None:
+            return exact
+
+        # 回退到子串匹配，命中即短路
+        return next(
+            (full for lower, full in self._title_index.items() if partial in lower),
+            None
+        )
 
     def adjust_weights(self, content_weight: float):
         if 0 <= content_weight <= 1:
@@ -116,6 +165,26 @@ class ImprovedHybridRecommender:
         else:
             print("Weight must be between 0 and 1")
 
+def load_hybrid_recommender(movies_path: str,
+                            ratings_path: str,
+                            tmdb_api_key: str) -> ImprovedHybridRecommender:
+    """
+    Streamlit工厂入口：cache_resource保证混合推荐器（含CF训练）
+    在所有session间只构建一次，而不是每次rerun都重建
+    """
+    import streamlit as st
+
+    @st.cache_resource(max_entries=1)
+    def _build(movies_path: str, ratings_path: str, tmdb_api_key: str):
+        return ImprovedHybridRecommender(
+            movies_path=movies_path,
+            ratings_path=ratings_path,
+            tmdb_api_key=tmdb_api_key
+        )
+
+    return _build(movies_path, ratings_path, tmdb_api_key)
+
+
 def main():
     TMDB_API_KEY = "b32b227102e481fb8a48b5f68065a3b9"
     
@@ -1,15 +1,57 @@
 # frontend.py
 
+import asyncio
 import base64
+import html
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import orjson
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+
+try:
+    # httpx needs the optional h2 extra for HTTP/2; fall back to
+    # HTTP/1.1 pooling rather than raising when it's absent
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 import pandas as pd
 from CBFRS import MultilingualMovieRecommender
 import emoji
 
+# Fail fast at import if the key is missing instead of erroring per call,
+# and share one params dict so helpers stop re-reading the environment
+TMDB_API_KEY = os.environ["TMDB_API_KEY"]
+TMDB_BASE_URL = 'https://api.themoviedb.org/3'
+_DEFAULT_PARAMS = {'api_key': TMDB_API_KEY, 'language': 'en-US'}
+
+# Shared session so every TMDB call reuses a pooled TCP/TLS connection.
+# The retry policy also absorbs TMDB 429 rate limits with backoff.
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+
+# TMDB poster widths per display context: the 5-column grid and 100px
+# sidebar don't need the 500px JPEG the detail view shows
+POSTER_SIZES = {'thumb': 'w185', 'detail': 'w500', 'sidebar': 'w92'}
+
+def poster_url_for(poster_path, size):
+    if not poster_path:
+        return None
+    return f"https://image.tmdb.org/t/p/{POSTER_SIZES[size]}{poster_path}"
 
 # Helper Functions
+# cache the encode: Streamlit reruns this script on every interaction,
+# and re-reading + base64-encoding a multi-MB JPEG each rerun is pure waste
+@st.cache_data(show_spinner=False)
 def get_base64_of_bin_file(bin_file):
     with open(bin_file, 'rb') as f:
         data = f.read()
@@ -32,8 +74,9 @@ def set_jpg_as_page_bg(jpg_file):
 # set background image
 set_jpg_as_page_bg('resources/movie_background3.jpg')
 
-# set css
-st.markdown("""
+# static style block built once at import; the render path just hands
+# the same string to st.markdown on each rerun
+_STATIC_CSS = """
 <style>
 .block-container h1, .block-container h2, .block-container h3,
 .block-container h4, .block-container h5, .block-container h6,
@@ -70,12 +113,16 @@ st.markdown("""
     text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.7); 
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# set css
+st.markdown(_STATIC_CSS, unsafe_allow_html=True)
 
-# load recommender system, cache to boot the performance
-@st.cache_resource
+# load recommender system, cache to boot the performance: cache_resource is
+# a process-global singleton, and pinning one entry with no TTL means new
+# tabs reuse the same fitted recommender instead of re-parsing the CSV
+@st.cache_resource(ttl=None, max_entries=1)
 def load_recommender():
-    TMDB_API_KEY = os.getenv("TMDB_API_KEY")
     recommender = MultilingualMovieRecommender(
         movies_path='Data/enriched_movies.csv',
         tmdb_api_key=TMDB_API_KEY
@@ -84,147 +131,258 @@ def load_recommender():
 
 recommender = load_recommender()
 
+def trailer_url_from_videos(videos):
+    # single pass: return immediately on the first official trailer,
+    # remember the first unofficial one as a fallback
+    fallback_key = None
+    for video in videos:
+        if video.get('site') == 'YouTube' and video.get('type') == 'Trailer':
+            if video.get('official'):
+                return f"https://www.youtube.com/watch?v={video['key']}"
+            if fallback_key is None:
+                fallback_key = video.get('key')
+    return f'https://www.youtube.com/watch?v={fallback_key}' if fallback_key else None
+
+# Streamlit reruns this script on every interaction; st.cache_data memoizes
+# the TMDB lookups per-argument across reruns (and sessions), so widget
+# clicks serve from cache instead of re-paying the HTTP round-trip
+@st.cache_data(ttl=86400, show_spinner=False)
 def get_movie_trailer(tmdb_id):
-    api_key = os.getenv("TMDB_API_KEY")
-    videos_url = f'https://api.themoviedb.org/3/movie/{tmdb_id}/videos'
-    videos_params = {
-        'api_key': api_key,
-        'language': 'en-US'
-    }
-    videos_response = requests.get(videos_url, params=videos_params)
-    if videos_response.status_code == 200:
-        videos_data = videos_response.json()
-        videos = videos_data.get('results', [])
-        for video in videos:
-            if video['type'] == 'Trailer' and video['site'] == 'YouTube':
-                youtube_key = video['key']
-                trailer_url = f'https://www.youtube.com/watch?v={youtube_key}'
-                return trailer_url
-    return None
+    # raise on failure so st.cache_data doesn't memoize a transient
+    # error as "no trailer" for 24 hours; callers catch and degrade
+    videos_url = f'{TMDB_BASE_URL}/movie/{tmdb_id}/videos'
+    videos_response = SESSION.get(videos_url, params=_DEFAULT_PARAMS, timeout=5)
+    videos_response.raise_for_status()
+    videos_data = orjson.loads(videos_response.content)
+    return trailer_url_from_videos(videos_data.get('results', []))
+
+def fetch_trailer(tmdb_id):
+    # uncached guard: a failed lookup costs only this rerun
+    try:
+        return get_movie_trailer(tmdb_id)
+    except requests.RequestException:
+        return None
 
+@st.cache_data(ttl=86400, show_spinner=False)
 def get_movie_info_by_id(tmdb_id):
-    api_key = os.getenv("TMDB_API_KEY")
-    details_url = f'https://api.themoviedb.org/3/movie/{tmdb_id}'
+    details_url = f'{TMDB_BASE_URL}/movie/{tmdb_id}'
     details_params = {
-        'api_key': api_key,
-        'language': 'en-US'
+        **_DEFAULT_PARAMS,
+        # append_to_response folds the videos payload into the same
+        # response, so details + trailer cost one round-trip, not two
+        'append_to_response': 'videos'
+    }
+    details_response = SESSION.get(details_url, params=details_params, timeout=5)
+    # raising keeps failures out of the cache (and out of st.error, whose
+    # side-effect would only fire on the miss anyway)
+    details_response.raise_for_status()
+    details = orjson.loads(details_response.content)
+    poster_url = poster_url_for(details.get('poster_path'), 'detail')
+
+    # trailer comes appended to the details response
+    trailer_url = trailer_url_from_videos(details.get('videos', {}).get('results', []))
+
+    return {
+        'tmdb_id': tmdb_id,
+        'title': details.get('title', 'N/A'),
+        'release_date': details.get('release_date', 'N/A'),
+        'synopsis': details.get('overview', 'N/A'),
+        'poster_url': poster_url,
+        'trailer_url': trailer_url
     }
-    details_response = requests.get(details_url, params=details_params)
-    if details_response.status_code == 200:
-        details = details_response.json()
-        poster_path = details.get('poster_path')
-        poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else None
 
-        # get trailer
-        trailer_url = get_movie_trailer(tmdb_id)
+def fetch_movie_info(tmdb_id):
+    # uncached guard: a failed lookup costs only this rerun
+    try:
+        return get_movie_info_by_id(tmdb_id)
+    except requests.RequestException:
+        return None
+
+@st.cache_data(ttl=86400, max_entries=256, show_spinner=False)
+def load_poster(url):
+    # cache the poster bytes server-side so reruns redraw the grid from
+    # memory instead of sending the browser back to the TMDB CDN
+    response = SESSION.get(url, timeout=5)
+    response.raise_for_status()
+    return response.content
+
+def fetch_poster(url):
+    # uncached guard: a failed fetch costs only this rerun
+    if not url:
+        return None
+    try:
+        return load_poster(url)
+    except requests.RequestException:
+        return None
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def get_popular_movies(pages=1, limit=10):
+    popular_url = f'{TMDB_BASE_URL}/movie/popular'
+
+    def fetch_page(page):
+        params = {**_DEFAULT_PARAMS, 'page': page}
+        response = SESSION.get(popular_url, params=params, timeout=5)
+        # propagate failures: st.cache_data doesn't cache raising calls,
+        # so the next rerun retries instead of showing a blank grid all day
+        response.raise_for_status()
+        return orjson.loads(response.content).get('results', [])
+
+    # several pages cost ~1 RTT instead of one after another
+    if pages == 1:
+        page_results = [fetch_page(1)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(pages, 5)) as executor:
+            page_results = list(executor.map(fetch_page, range(1, pages + 1)))
+
+    movies = [movie for results in page_results for movie in results]
+
+    # No trailer lookups here: most sessions never click play, so the
+    # grid renders from the popular payload alone and trailers are
+    # fetched on demand (and memoized) when a button is pressed.
+    # Only the movies actually displayed get a dict built at all.
+    popular_movies = []
+    for movie in movies[:limit]:
+        poster_url = poster_url_for(movie.get('poster_path'), 'thumb')
 
         movie_info = {
-            'tmdb_id': tmdb_id,
-            'title': details.get('title', 'N/A'),
-            'release_date': details.get('release_date', 'N/A'),
-            'synopsis': details.get('overview', 'N/A'),
-            'poster_url': poster_url,
-            'trailer_url': trailer_url
+            'id': movie.get('id'),
+            'title': movie.get('title', 'N/A'),
+            'release_date': movie.get('release_date', 'N/A'),
+            'synopsis': movie.get('overview', 'N/A'),
+            'poster_url': poster_url
         }
-        return movie_info
-    else:
-        st.error("No info available")
+        popular_movies.append(movie_info)
+    return popular_movies
+
+async def fetch_json(client, url, params):
+    try:
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    except httpx.HTTPError:
         return None
 
-def get_popular_movies():
-    api_key = os.getenv("TMDB_API_KEY")
-    popular_url = 'https://api.themoviedb.org/3/movie/popular'
-    params = {
-        'api_key': api_key,
-        'language': 'en-US',
-        'page': 1
-    }
+async def hydrate_recommendations(rec_rows):
+    # fan out every poster-fallback and trailer call for the sidebar in
+    # one gather; HTTP/2 multiplexes them all over a single TLS session
+    async def rec_media(client, rec):
+        tmdb_id = rec['tmdb_id']
+
+        async def poster():
+            if 'poster_path' in rec and pd.notna(rec['poster_path']) and rec['poster_path']:
+                return poster_url_for(rec['poster_path'], 'sidebar')
+            details = await fetch_json(client, f'/movie/{tmdb_id}', {'api_key': TMDB_API_KEY})
+            return poster_url_for(details.get('poster_path') if details else None, 'sidebar')
+
+        async def trailer():
+            videos = await fetch_json(
+                client, f'/movie/{tmdb_id}/videos', _DEFAULT_PARAMS
+            )
+            return trailer_url_from_videos(videos.get('results', [])) if videos else None
 
-    response = requests.get(popular_url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        movies = data['results']
-        popular_movies = []
-        for movie in movies:
-            poster_path = movie.get('poster_path')
-            poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else None
-            trailer_url = get_movie_trailer(movie.get('id'))
-
-            movie_info = {
-                'id': movie.get('id'),
-                'title': movie.get('title', 'N/A'),
-                'release_date': movie.get('release_date', 'N/A'),
-                'synopsis': movie.get('overview', 'N/A'),
-                'poster_url': poster_url,
-                'trailer_url': trailer_url
-            }
-            popular_movies.append(movie_info)
-        return popular_movies
-    else:
-        st.error("Unable to fetch popular movies")
-        return None
+        return await asyncio.gather(poster(), trailer())
+
+    async with httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        base_url=TMDB_BASE_URL,
+        timeout=5.0
+    ) as client:
+        return await asyncio.gather(*(rec_media(client, rec) for rec in rec_rows))
 
 # set header
 st.title(emoji.emojize("🎬 Movie Recommendation System"))
 
 # set sub header
 st.subheader(emoji.emojize("✨ Explore Trending Movies"))
-popular_movies = get_popular_movies()
+try:
+    popular_movies = get_popular_movies()
+except requests.RequestException:
+    popular_movies = None
+    st.error("Unable to fetch popular movies")
 
 if popular_movies:
-    # 5 columns for layout
-    cols = st.columns(5)
-    for idx, movie in enumerate(popular_movies[:10]):
-        with cols[idx % 5]:
-            if movie['poster_url']:
-                st.image(movie['poster_url'])
-            else:
-                st.write("No Poster Available")
-            # add css
-            st.markdown(f"<p class='single-line'>{movie['title']}</p>", unsafe_allow_html=True)
-
-            # add play button
-            if movie.get('trailer_url'):
-                if st.button('▶️ Play Trailer', key=f"trailer_{movie['id']}"):
-                    with st.expander("▶️ Trailer"):
-                        st.video(movie['trailer_url'])
-            else:
-                st.write("No Trailer Available")
+    display_movies = popular_movies[:10]
+
+    # one markdown message instead of 40+ widget calls: the whole grid is
+    # a single HTML string, and the browser caches the CDN thumbnails
+    cells = []
+    for movie in display_movies:
+        if movie['poster_url']:
+            poster_html = f'<img src="{movie["poster_url"]}" style="width:100%;border-radius:4px;"/>'
+        else:
+            poster_html = '<p>No Poster Available</p>'
+        cells.append(
+            f'<div style="width:19%;">{poster_html}'
+            f'<p class="single-line">{html.escape(movie["title"])}</p></div>'
+        )
+    grid_html = '<div style="display:flex;flex-wrap:wrap;gap:1%;">' + ''.join(cells) + '</div>'
+    st.markdown(grid_html, unsafe_allow_html=True)
+
+    # one selectbox + button replaces ten per-movie buttons;
+    # the trailer is still only fetched on click
+    trailer_choices = {movie['title']: movie['id'] for movie in display_movies}
+    selected_trailer_title = st.selectbox("Pick a movie to preview its trailer:", list(trailer_choices))
+    if st.button('▶️ Play Trailer', key='popular_trailer'):
+        trailer_url = fetch_trailer(trailer_choices[selected_trailer_title])
+        if trailer_url:
+            with st.expander("▶️ Trailer"):
+                st.video(trailer_url)
+        else:
+            st.write("No Trailer Available")
 
 # Movie Searching
 movie_name = st.text_input("🔍 Begin Searching")
 
 if movie_name:
-    movie_infos = recommender.find_movie_by_search(movie_name)
+    # session_state memoizes the active search: a trailer click reruns the
+    # whole script, but the same query doesn't re-run the search pipeline
+    if st.session_state.get('last_query') != movie_name:
+        st.session_state.last_query = movie_name
+        st.session_state.movie_infos = recommender.find_movie_by_search(movie_name)
+        st.session_state.rec_cache = {}
+    movie_infos = st.session_state.movie_infos
     if movie_infos:
         # Add select box for multiple recommendation result
         if len(movie_infos) > 1:
-            options = []
+            # resolve every candidate's info once, in one parallel wave;
+            # the old loop called get_movie_info_by_id twice per option
+            # and a third time after selection
+            candidate_ids = [info[2] for info in movie_infos]
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                infos = dict(zip(candidate_ids, executor.map(fetch_movie_info, candidate_ids)))
+
+            # map display strings straight to their tuples: O(1) lookup on
+            # selection, and duplicate titles can't resolve to the wrong movie
+            option_to_tuple = {}
             for info in movie_infos:
                 # unboxing tuple
                 idx, title, tmdb_id = info
                 if title:
-                    release_year = get_movie_info_by_id(tmdb_id)['release_date'][:4] if get_movie_info_by_id(tmdb_id) else 'N/A'
+                    candidate_info = infos[tmdb_id]
+                    release_year = candidate_info['release_date'][:4] if candidate_info else 'N/A'
                     display_title = f"{title} ({release_year})"
                 else:
                     display_title = f"TMDB ID {tmdb_id}"
-                options.append(display_title)
-            selected_option = st.selectbox("Please select a movie:", options)
-            selected_index = options.index(selected_option)
-            selected_movie_info_tuple = movie_infos[selected_index]
+                if display_title in option_to_tuple:
+                    # disambiguate colliding display strings with the id
+                    display_title = f"{display_title} [TMDB {tmdb_id}]"
+                option_to_tuple[display_title] = info
+            selected_option = st.selectbox("Please select a movie:", list(option_to_tuple))
+            selected_movie_info_tuple = option_to_tuple[selected_option]
             tmdb_id = selected_movie_info_tuple[2]
-            movie_info = get_movie_info_by_id(tmdb_id)
+            movie_info = infos[tmdb_id]
         else:
             selected_movie_info_tuple = movie_infos[0]
             tmdb_id = selected_movie_info_tuple[2]
-            movie_info = get_movie_info_by_id(tmdb_id)
+            movie_info = fetch_movie_info(tmdb_id)
 
         if movie_info:
             # display movie detail
             col1, col2 = st.columns(2)
             with col1:
-                if movie_info["poster_url"]:
-                    st.image(movie_info["poster_url"])
+                poster_bytes = fetch_poster(movie_info['poster_url'])
+                if poster_bytes:
+                    st.image(poster_bytes)
                 else:
                     st.write("No Poster")
             with col2:
@@ -239,43 +397,37 @@ if movie_name:
             else:
                 st.write("No Trailer Available")
 
-            # add sider bar to display
-            recommendations = recommender.get_movie_recommendations(
-                search_title=movie_info['title'],
-                n_recommendations=5,
-                min_rating=7.0,
-                min_votes=1000
-            )
+            # add sider bar to display; recommendations and their hydrated
+            # media are stashed per selected movie for the session
+            rec_cache = st.session_state.setdefault('rec_cache', {})
+            if tmdb_id not in rec_cache:
+                recommendations = recommender.get_movie_recommendations(
+                    search_title=movie_info['title'],
+                    n_recommendations=5,
+                    min_rating=7.0,
+                    min_votes=1000
+                )
+                if recommendations is not None and not recommendations.empty:
+                    # fan out all poster/trailer calls on one event loop so
+                    # the sidebar renders after ~1 round-trip, not N
+                    rec_rows = recommendations.to_dict('records')
+                    rec_media = asyncio.run(hydrate_recommendations(rec_rows))
+                else:
+                    rec_rows, rec_media = [], []
+                rec_cache[tmdb_id] = (rec_rows, rec_media)
+            rec_rows, rec_media = rec_cache[tmdb_id]
 
-            if recommendations is not None and not recommendations.empty:
+            if rec_rows:
                 st.sidebar.header(emoji.emojize("🔍 Similar Movies"))
-                for _, rec in recommendations.iterrows():
-                    tmdb_id = rec['tmdb_id']
-                    rec_title = rec['title']
-                    rec_search_url = f"https://www.themoviedb.org/movie/{tmdb_id}"
-
-                    # set poster url
-                    if 'poster_path' in rec and rec['poster_path']:
-                        poster_url = f"https://image.tmdb.org/t/p/w500{rec['poster_path']}"
-                    else:
-                        details_url = f'https://api.themoviedb.org/3/movie/{tmdb_id}'
-                        params = {'api_key': os.getenv("TMDB_API_KEY")}
-                        details_response = requests.get(details_url, params=params)
-                        if details_response.status_code == 200:
-                            details = details_response.json()
-                            poster_path = details.get('poster_path')
-                            poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else None
-                        else:
-                            poster_url = None
 
+                for rec, (poster_url, trailer_url) in zip(rec_rows, rec_media):
                     # display poster
-                    if poster_url:
-                        st.sidebar.image(poster_url, width=100)
+                    poster_bytes = fetch_poster(poster_url)
+                    if poster_bytes:
+                        st.sidebar.image(poster_bytes, width=100)
                     else:
                         st.sidebar.write("No Poster")
 
-                    # get trailer url
-                    trailer_url = get_movie_trailer(tmdb_id)
                     if trailer_url:
                         st.sidebar.markdown(f"[▶️ Play Trailer]({trailer_url})")
                     else: